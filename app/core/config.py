@@ -38,6 +38,14 @@ class Settings:
     USE_LLM_RANKING: bool = os.getenv("USE_LLM_RANKING", "false").lower() == "true"
     MAX_LLM_CANDIDATES: int = int(os.getenv("MAX_LLM_CANDIDATES", "30"))
 
+    # Staged Groq HTTP timeouts (seconds). Connect/write/pool failures are
+    # detectable quickly; only the read phase (the model generating) should
+    # get the long budget.
+    GROQ_CONNECT_TIMEOUT: float = float(os.getenv("GROQ_CONNECT_TIMEOUT", "2.0"))
+    GROQ_READ_TIMEOUT: float = float(os.getenv("GROQ_READ_TIMEOUT", "8.0"))
+    GROQ_WRITE_TIMEOUT: float = float(os.getenv("GROQ_WRITE_TIMEOUT", "2.0"))
+    GROQ_POOL_TIMEOUT: float = float(os.getenv("GROQ_POOL_TIMEOUT", "1.0"))
+
 
 settings = Settings()
 
@@ -9,6 +9,10 @@ Phase 1 responsibilities:
 
 from __future__ import annotations
 
+import json
+import pickle
+import re
+from functools import cache, lru_cache
 from pathlib import Path
 from typing import Optional
 
@@ -30,7 +34,11 @@ import polars as pl
 from datasets import load_dataset
 
 
-_INDEX: Optional[pl.DataFrame] = None
+# Cuisine bitmask encoding: the dataset has ~107 distinct cuisines, so each
+# row's cuisine set fits in two UInt64 words. Query-time intersection then
+# becomes a bitwise AND per row instead of a per-row list intersection.
+_CUISINE_MASK_WORDS = 2
+CUISINE_MASK_COLUMNS = ("cuisines_mask", "cuisines_mask2")
 
 
 def _ensure_directories() -> None:
@@ -51,6 +59,36 @@ def load_raw_dataset():
     return load_dataset(settings.HF_DATASET_NAME, split=settings.HF_DATASET_SPLIT)
 
 
+def rebuild_processed_dataset(limit: Optional[int] = None) -> pl.DataFrame:
+    """
+    Offline utility: regenerate the processed parquet from the raw dataset.
+
+    The HuggingFace dataset is Arrow-backed, so `pl.from_arrow` converts it
+    to Polars zero-copy — no pandas round-trip, which would materialize
+    object-dtype columns and double peak memory during the build.
+    """
+    _ensure_directories()
+
+    raw_ds = load_raw_dataset()
+    df = pl.from_arrow(raw_ds.data.table)
+
+    if limit is not None:
+        df = df.head(limit)
+
+    df = _normalize_dataframe(df)
+    df.write_parquet(settings.PROCESSED_DATASET_PATH)
+
+    bit_index = _build_cuisine_bit_index(df)
+    if bit_index:
+        _persist_cuisine_bit_index(bit_index)
+
+    token_index = _build_location_token_index(df)
+    if token_index:
+        _persist_location_token_index(token_index)
+
+    return df
+
+
 def _normalize_dataframe(df: pl.DataFrame) -> pl.DataFrame:
     """
     Apply normalization steps to the raw restaurants dataframe.
@@ -65,87 +103,255 @@ def _normalize_dataframe(df: pl.DataFrame) -> pl.DataFrame:
     initial_count = df.height
     print(f"[DEBUG] Rows before deduplication: {initial_count}")
 
-    # Create internal normalization columns for a robust dedup key
-    # We use name, location, and address as requested.
-    df = df.with_columns([
-        pl.col("name").cast(pl.Utf8).str.to_lowercase().str.strip_chars().fill_null("").alias("_name_norm"),
-        pl.col("location").cast(pl.Utf8).str.to_lowercase().str.strip_chars().fill_null("").alias("_loc_norm"),
-        pl.col("address").cast(pl.Utf8).str.to_lowercase().str.strip_chars().fill_null("").alias("_addr_norm")
-    ])
-    
+    # Dedup key over name+location+address: hash each normalized field into a
+    # UInt64 and XOR them (distinct seeds so equal fields cannot cancel out)
+    # inside a single expression — no temporary columns to allocate and drop.
     df = df.with_columns(
-        (pl.col("_name_norm") + "|" + pl.col("_loc_norm") + "|" + pl.col("_addr_norm")).alias("dedup_key")
+        (
+            pl.col("name").cast(pl.Utf8).str.to_lowercase().str.strip_chars().fill_null("").hash(seed=1)
+            ^ pl.col("location").cast(pl.Utf8).str.to_lowercase().str.strip_chars().fill_null("").hash(seed=2)
+            ^ pl.col("address").cast(pl.Utf8).str.to_lowercase().str.strip_chars().fill_null("").hash(seed=3)
+        ).alias("dedup_key")
     )
 
     # Sort by votes descending to keep the most popular entry
     if "votes" in df.columns:
         df = df.sort("votes", descending=True)
-    
+
     # Perform deduplication
-    df = df.unique(subset=["dedup_key"], keep="first")
-    
-    # Remove temporary internal columns
-    df = df.drop(["_name_norm", "_loc_norm", "_addr_norm", "dedup_key"])
+    df = df.unique(subset=["dedup_key"], keep="first").drop("dedup_key")
 
     final_count = df.height
     print(f"[DEBUG] Rows after deduplication: {final_count} (removed {initial_count - final_count})")
 
-    # 2. Add a stable integer ID based on row position AFTER deduplication.
-    df = df.with_columns(pl.arange(0, pl.len()).alias("id"))
-
-    # 3. Normalize rating: extract leading numeric from strings like "4.1/5".
+    # 2..6. The remaining normalization expressions are independent of each
+    # other, so they run as a single fused with_columns pass — one columnar
+    # traversal instead of one plan boundary per column:
+    # - stable integer ID based on row position AFTER deduplication
+    # - rating: extract leading numeric from strings like "4.1/5"
+    # - approximate cost for two: strip commas and cast to integer
+    # - normalized location key, stored as Categorical so query-time filters
+    #   compare dictionary codes instead of scanning full strings
+    # - cuisines as normalized list of strings
+    cost_col = "approx_cost(for two people)"
     df = df.with_columns(
-        pl.col("rate")
-        .cast(pl.Utf8)
-        .str.extract(r"([\d.]+)", 1)
-        .cast(pl.Float64, strict=False)
-        .alias("rating_numeric")
+        [
+            pl.arange(0, pl.len()).alias("id"),
+            pl.col("rate")
+            .cast(pl.Utf8)
+            .str.extract(r"([\d.]+)", 1)
+            .cast(pl.Float64, strict=False)
+            .alias("rating_numeric"),
+            (
+                pl.col(cost_col)
+                .cast(pl.Utf8)
+                .str.replace_all(",", "")
+                .str.extract(r"(\d+)", 1)
+                .cast(pl.Int64, strict=False)
+                if cost_col in df.columns
+                else pl.lit(None, dtype=pl.Int64)
+            ).alias("approx_cost_for_two"),
+            (
+                pl.col("location")
+                .cast(pl.Utf8)
+                .str.to_lowercase()
+                .str.strip_chars()
+                .cast(pl.Categorical)
+                if "location" in df.columns
+                else pl.lit(None, dtype=pl.Categorical)
+            ).alias("location_normalized"),
+            (
+                pl.col("cuisines")
+                .cast(pl.Utf8)
+                .str.to_lowercase()
+                .str.split(",")
+                .list.eval(pl.element().str.strip_chars())
+                if "cuisines" in df.columns
+                else pl.lit(None, dtype=pl.List(pl.Utf8))
+            ).alias("cuisines_normalized"),
+        ]
     )
 
-    # 4. Normalize approximate cost for two: strip commas and cast to integer.
-    cost_col = "approx_cost(for two people)"
-    if cost_col in df.columns:
-        df = df.with_columns(
-            pl.col(cost_col)
-            .cast(pl.Utf8)
-            .str.replace_all(",", "")
-            .str.extract(r"(\d+)", 1)
-            .cast(pl.Int64, strict=False)
-            .alias("approx_cost_for_two")
-        )
-    else:
-        df = df.with_columns(pl.lit(None, dtype=pl.Int64).alias("approx_cost_for_two"))
+    # 7. Cuisine bitmask columns for fast query-time intersection.
+    bit_index = _build_cuisine_bit_index(df)
+    if bit_index:
+        df = _with_cuisine_masks(df, bit_index)
 
-    # 5. Normalized location key for grouping/lookup.
-    if "location" in df.columns:
-        df = df.with_columns(
-            pl.col("location")
-            .cast(pl.Utf8)
-            .str.to_lowercase()
-            .str.strip_chars()
-            .alias("location_normalized")
-        )
-    else:
-        df = df.with_columns(
-            pl.lit(None, dtype=pl.Utf8).alias("location_normalized")
+    # 8. Query-independent score terms, materialized once so the ranking
+    # engine reads them instead of recomputing per request.
+    df = _with_score_terms(df)
+
+    return df
+
+
+def _with_score_terms(df: pl.DataFrame) -> pl.DataFrame:
+    """
+    Precompute the query-independent ranking terms as Float32 columns.
+
+    `votes_log10` and `rating_term` are pure functions of stored columns;
+    computing them at build time turns per-request floating-point work into
+    a plain column read (and Float32 halves the bytes moved).
+    """
+    votes_term = (
+        (pl.col("votes").fill_null(0).cast(pl.Float32) + 1.0).log10().fill_null(0.0)
+        if "votes" in df.columns
+        else pl.lit(0.0, dtype=pl.Float32)
+    )
+    return df.with_columns(
+        [
+            votes_term.alias("votes_log10"),
+            (pl.col("rating_numeric").fill_null(0) / 5.0)
+            .cast(pl.Float32)
+            .alias("rating_term"),
+        ]
+    )
+
+
+def _build_cuisine_bit_index(df: pl.DataFrame) -> dict[str, int]:
+    """
+    Build a deterministic cuisine -> bit position mapping from the dataframe.
+
+    The mapping is derived from the sorted unique cuisines so that it can be
+    reproduced from any dataframe carrying the same `cuisines_normalized`
+    column. Returns an empty dict when there are no cuisines or too many to
+    encode in the fixed number of mask words.
+    """
+    if "cuisines_normalized" not in df.columns:
+        return {}
+
+    cuisines = (
+        df.select(pl.col("cuisines_normalized").explode())
+        .drop_nulls()
+        .unique()
+        .sort("cuisines_normalized")
+        .to_series()
+        .to_list()
+    )
+
+    if not cuisines or len(cuisines) > 64 * _CUISINE_MASK_WORDS:
+        return {}
+
+    return {cuisine: bit for bit, cuisine in enumerate(cuisines)}
+
+
+def _with_cuisine_masks(df: pl.DataFrame, bit_index: dict[str, int]) -> pl.DataFrame:
+    """Encode each row's cuisine list into the UInt64 mask columns."""
+    mask_exprs = []
+    for word, column in enumerate(CUISINE_MASK_COLUMNS):
+        low, high = word * 64, (word + 1) * 64
+        word_bits = {
+            cuisine: (1 << (bit - low)) if low <= bit < high else 0
+            for cuisine, bit in bit_index.items()
+        }
+        # Bit values are passed as a UInt64 Series: 1 << 63 overflows the
+        # i64 dtype that replace_strict would otherwise infer.
+        mask_exprs.append(
+            pl.col("cuisines_normalized")
+            .list.unique()
+            .list.eval(
+                pl.element().replace_strict(
+                    old=list(word_bits.keys()),
+                    new=pl.Series(list(word_bits.values()), dtype=pl.UInt64),
+                    default=0,
+                    return_dtype=pl.UInt64,
+                )
+            )
+            .list.sum()
+            .fill_null(0)
+            .cast(pl.UInt64)
+            .alias(column)
         )
+    return df.with_columns(mask_exprs)
 
-    # 6. Cuisines as normalized list of strings.
-    if "cuisines" in df.columns:
-        df = df.with_columns(
-            pl.col("cuisines")
-            .cast(pl.Utf8)
-            .str.to_lowercase()
-            .str.split(",")
-            .list.eval(pl.element().str.strip_chars())
-            .alias("cuisines_normalized")
+
+def _persist_cuisine_bit_index(bit_index: dict[str, int]) -> None:
+    """Write the cuisine bit index as a JSON sidecar next to the parquet."""
+    sidecar = settings.PROCESSED_DIR / "cuisine_bit_index.json"
+    try:
+        sidecar.write_text(json.dumps(bit_index, sort_keys=True))
+    except OSError:
+        # The sidecar is a convenience artifact; the mapping can always be
+        # rebuilt from the dataframe itself.
+        pass
+
+
+def _build_location_token_index(df: pl.DataFrame) -> dict[str, frozenset[int]]:
+    """
+    Build an inverted index token -> row ids from the normalized locations.
+
+    Tokens are the comma/whitespace-separated words of the locations, and
+    each token maps to every row whose normalized location *contains* it as
+    a substring — the same semantics as the fallback scan. A query equal to
+    a token (the common case, e.g. "banashankari") resolves to its row-id
+    set in O(1), including rows where the token only appears embedded in a
+    longer word ("nagar" must also match "indiranagar" and "jayanagar").
+    """
+    if "location_normalized" not in df.columns or "id" not in df.columns:
+        return {}
+
+    # Row ids per distinct location value (~100 distinct locations), so the
+    # substring expansion below runs over location values, not rows.
+    grouped = (
+        df.select(
+            pl.col("location_normalized").cast(pl.Utf8).alias("location"),
+            pl.col("id"),
         )
-    else:
-        df = df.with_columns(
-            pl.lit(None, dtype=pl.List(pl.Utf8)).alias("cuisines_normalized")
+        .drop_nulls("location")
+        .group_by("location")
+        .agg(pl.col("id"))
+    )
+    ids_by_location = dict(zip(grouped["location"], grouped["id"].to_list()))
+
+    tokens = {
+        token
+        for location in ids_by_location
+        for token in re.findall(r"[^,\s]+", location)
+    }
+
+    return {
+        token: frozenset(
+            rid
+            for location, ids in ids_by_location.items()
+            if token in location
+            for rid in ids
         )
+        for token in tokens
+    }
 
-    return df
+
+def _persist_location_token_index(token_index: dict[str, frozenset[int]]) -> None:
+    """Write the location token index as a pickle next to the parquet."""
+    sidecar = settings.PROCESSED_DIR / "location_token_index.pkl"
+    try:
+        sidecar.write_bytes(pickle.dumps(token_index))
+    except OSError:
+        # Convenience artifact only; it is rebuilt from the dataframe.
+        pass
+
+
+@lru_cache(maxsize=1)
+def _location_token_index_for(index_id: int) -> dict[str, frozenset[int]]:
+    return _build_location_token_index(get_restaurants_index())
+
+
+def get_location_token_index() -> dict[str, frozenset[int]]:
+    """Token -> row-id inverted index for the active restaurants index."""
+    return _location_token_index_for(id(get_restaurants_index()))
+
+
+@lru_cache(maxsize=1)
+def _cuisine_bit_index_for(index_id: int) -> dict[str, int]:
+    return _build_cuisine_bit_index(get_restaurants_index())
+
+
+def get_cuisine_bit_index() -> dict[str, int]:
+    """
+    Cuisine -> bit position mapping for the active restaurants index.
+
+    Empty when the index carries no mask columns (e.g. too many distinct
+    cuisines to encode); callers should then fall back to list intersection.
+    """
+    return _cuisine_bit_index_for(id(get_restaurants_index()))
 
 
 def build_restaurants_index(
@@ -166,12 +372,47 @@ def build_restaurants_index(
 
     df = pl.read_parquet(processed_path)
 
+    # Processed files written before the Categorical location column was
+    # introduced store it as plain Utf8; upgrade on load.
+    if df.schema.get("location_normalized") == pl.Utf8:
+        df = df.with_columns(pl.col("location_normalized").cast(pl.Categorical))
+
+    # Processed files written before the bitmask columns existed are
+    # upgraded on load; the mapping is persisted as a JSON sidecar.
+    if CUISINE_MASK_COLUMNS[0] not in df.columns:
+        bit_index = _build_cuisine_bit_index(df)
+        if bit_index:
+            df = _with_cuisine_masks(df, bit_index)
+            _persist_cuisine_bit_index(bit_index)
+
+    # Likewise for the precomputed score-term columns.
+    if "votes_log10" not in df.columns:
+        df = _with_score_terms(df)
+
     if limit is not None:
         return df.head(limit)
 
     return df
 
 
+# Caches derived from the loaded index but owned by other modules (location
+# matching, rank-stage memo, filter metadata). They key on the index's id(),
+# so they must be cleared in lockstep with the loader's own id-keyed caches
+# on rebuild: CPython reuses freed ids, and a recycled id would otherwise
+# silently serve results computed from the previous dataset.
+_derived_caches: list = []
+
+
+def register_index_derived_cache(cached_fn) -> None:
+    """Register an id(index)-keyed lru_cache to be cleared on force_rebuild."""
+    _derived_caches.append(cached_fn)
+
+
+@cache
+def _cached_index() -> pl.DataFrame:
+    return build_restaurants_index(limit=None, force_rebuild=False)
+
+
 def get_restaurants_index(
     limit: Optional[int] = None, force_rebuild: bool = False
 ) -> pl.DataFrame:
@@ -179,13 +420,19 @@ def get_restaurants_index(
     Retrieve the in-memory restaurants index, building or reloading as necessary.
 
     This is the canonical entrypoint other parts of the backend should use.
+    The single-shot build is guarded by functools.cache, so concurrent cold
+    starts under FastAPI's thread pool collapse into one parquet read.
     """
-    global _INDEX
+    if force_rebuild:
+        _cached_index.cache_clear()
+        _cuisine_bit_index_for.cache_clear()
+        _location_token_index_for.cache_clear()
+        for cached_fn in _derived_caches:
+            cached_fn.cache_clear()
 
-    if _INDEX is None or force_rebuild:
-        _INDEX = build_restaurants_index(limit=None, force_rebuild=force_rebuild)
+    index = _cached_index()
 
     if limit is not None:
-        return _INDEX.head(limit)
-    return _INDEX
+        return index.head(limit)
+    return index
 
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+from functools import cached_property
 from typing import List, Optional
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
 class RecommendationQuery(BaseModel):
+    # Frozen so queries are hashable and the derived cache key can be
+    # memoized per instance instead of re-serializing on every lookup.
+    model_config = ConfigDict(frozen=True)
+
     location: Optional[str] = Field(
         default=None,
         description="Preferred location or area name (e.g., 'Banashankari').",
@@ -37,6 +42,30 @@ class RecommendationQuery(BaseModel):
             raise ValueError("budget_max must be greater than or equal to budget_min")
         return v
 
+    @cached_property
+    def normalized_cuisines(self) -> list[str]:
+        """Lowercased, stripped cuisines — computed once per query instance."""
+        return [c.lower().strip() for c in self.cuisines if c and c.strip()]
+
+    @cached_property
+    def signature(self) -> tuple:
+        """
+        Canonical tuple of the query's filter-relevant fields.
+
+        Single source of truth for caching and memoization: every cache
+        layer keys off this tuple directly — not its 64-bit hash, which
+        could collide across distinct queries — so equivalent queries,
+        regardless of cuisine order or casing, share entries.
+        """
+        return (
+            self.location or "",
+            tuple(sorted(self.normalized_cuisines)),
+            self.min_rating,
+            self.budget_min,
+            self.budget_max,
+            self.max_results,
+        )
+
 
 class RestaurantOut(BaseModel):
     id: int
@@ -1,24 +1,72 @@
 from __future__ import annotations
 
-from typing import Iterable, Optional
+from functools import lru_cache
 
 import polars as pl
 
 from app.schemas.recommendations import RecommendationQuery
+from app.services.dataset_loader import (
+    CUISINE_MASK_COLUMNS,
+    get_cuisine_bit_index,
+    get_location_token_index,
+    get_restaurants_index,
+    register_index_derived_cache,
+)
 
 
-def _normalize_cuisines(cuisines: Optional[Iterable[str]]) -> list[str]:
-    if not cuisines:
-        return []
-    return [c.lower().strip() for c in cuisines if c and c.strip()]
+@lru_cache(maxsize=1024)
+def _matching_locations_for(index_id: int, loc: str) -> tuple[str, ...]:
+    """
+    Resolve a location query substring to the matching normalized location
+    values, computed once per (index, query) pair. Turns the per-request
+    full-column regex scan into an `is_in` over a handful of values.
+    """
+    locations = (
+        get_restaurants_index()
+        .get_column("location_normalized")
+        .unique()
+        .drop_nulls()
+    )
+    return tuple(value for value in locations if loc in value)
+
+
+register_index_derived_cache(_matching_locations_for)
+
+
+def _matching_locations(loc: str) -> tuple[str, ...]:
+    return _matching_locations_for(id(get_restaurants_index()), loc)
+
+
+def _cuisine_mask_match(cuisines: list[str], bit_index: dict[str, int]) -> pl.Expr:
+    """
+    Build a bitmask predicate matching rows whose cuisine set intersects the
+    query cuisines: one AND + compare per mask word instead of a per-row
+    list intersection with string hashing.
+    """
+    word_masks = [0] * len(CUISINE_MASK_COLUMNS)
+    for cuisine in cuisines:
+        bit = bit_index.get(cuisine)
+        if bit is not None:
+            word_masks[bit // 64] |= 1 << (bit % 64)
+
+    match = pl.lit(False)
+    for column, word_mask in zip(CUISINE_MASK_COLUMNS, word_masks):
+        if word_mask:
+            match = match | (
+                (pl.col(column) & pl.lit(word_mask, dtype=pl.UInt64)) != 0
+            )
+    return match
 
 
 def filter_restaurants(
-    df: pl.DataFrame,
+    lf: pl.LazyFrame,
     query: RecommendationQuery,
-) -> pl.DataFrame:
+) -> pl.LazyFrame:
     """
-    Apply Phase 2 hard filters to the restaurants dataframe.
+    Apply Phase 2 hard filters to the restaurants lazy frame.
+
+    Operates on (and returns) a `pl.LazyFrame` so the filter predicates can be
+    fused with the downstream ranking expressions into a single query plan.
 
     Filters:
     - location (substring match on normalized location)
@@ -28,15 +76,22 @@ def filter_restaurants(
     """
     mask = pl.lit(True)
 
-    # Location filter (substring match on normalized location).
+    # Location filter (substring match on normalized location). Queries that
+    # equal a whole location token resolve through the precomputed inverted
+    # index; other substrings fall back to matching the distinct location
+    # values once and filtering with a categorical `is_in`.
     if query.location:
         loc = query.location.lower().strip()
         if loc:
-            location_match = (
-                pl.col("location_normalized")
-                .str.contains(loc)
-                .fill_null(False)
-            )
+            token_ids = get_location_token_index().get(loc)
+            if token_ids is not None:
+                location_match = pl.col("id").is_in(sorted(token_ids))
+            else:
+                location_match = (
+                    pl.col("location_normalized")
+                    .is_in(list(_matching_locations(loc)))
+                    .fill_null(False)
+                )
             mask = mask & location_match
 
     # Rating filter.
@@ -52,16 +107,22 @@ def filter_restaurants(
         mask = mask & ((cost_col <= query.budget_max) | cost_col.is_null())
 
     # Cuisine filter (intersection must be non-empty).
-    normalized_cuisines = _normalize_cuisines(query.cuisines)
+    normalized_cuisines = query.normalized_cuisines
     if normalized_cuisines:
-        intersect_len = (
-            pl.col("cuisines_normalized")
-            .list.set_intersection(pl.lit(normalized_cuisines))
-            .list.len()
-            .fill_null(0)
-        )
-        cuisine_match = intersect_len > 0
+        bit_index = get_cuisine_bit_index()
+        if bit_index and CUISINE_MASK_COLUMNS[0] in lf.collect_schema().names():
+            cuisine_match = _cuisine_mask_match(normalized_cuisines, bit_index)
+        else:
+            # Fallback for frames without mask columns (or datasets with too
+            # many distinct cuisines to encode).
+            intersect_len = (
+                pl.col("cuisines_normalized")
+                .list.set_intersection(pl.lit(normalized_cuisines))
+                .list.len()
+                .fill_null(0)
+            )
+            cuisine_match = intersect_len > 0
         mask = mask & cuisine_match
 
-    return df.filter(mask)
+    return lf.filter(mask)
 
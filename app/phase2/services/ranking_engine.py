@@ -1,54 +1,82 @@
 from __future__ import annotations
 
-from typing import Iterable, Optional
-
 import polars as pl
 
 from app.schemas.recommendations import RecommendationQuery
+from app.services.dataset_loader import CUISINE_MASK_COLUMNS, get_cuisine_bit_index
 
 
-def _normalize_cuisines(cuisines: Optional[Iterable[str]]) -> list[str]:
-    if not cuisines:
-        return []
-    return [c.lower().strip() for c in cuisines if c and c.strip()]
+def _cuisine_mask_match_count(cuisines: list[str], bit_index: dict[str, int]) -> pl.Expr:
+    """
+    Count matching query cuisines per row from the bitmask columns: one
+    AND + compare per query bit, avoiding a per-row list intersection.
+    """
+    match_count = pl.lit(0, dtype=pl.UInt32)
+    for cuisine in cuisines:
+        bit = bit_index.get(cuisine)
+        if bit is None:
+            continue
+        column = CUISINE_MASK_COLUMNS[bit // 64]
+        bit_mask = pl.lit(1 << (bit % 64), dtype=pl.UInt64)
+        match_count = match_count + ((pl.col(column) & bit_mask) != 0).cast(pl.UInt32)
+    return match_count
 
 
 def rank_restaurants(
-    df: pl.DataFrame,
+    lf: pl.LazyFrame,
     query: RecommendationQuery,
-) -> pl.DataFrame:
+) -> pl.LazyFrame:
     """
-    Apply a heuristic scoring function and return a ranked dataframe.
+    Apply a heuristic scoring function and return a ranked lazy frame.
+
+    Operates on (and returns) a `pl.LazyFrame`; the score expressions are
+    only evaluated for rows that survive the upstream filters once the
+    combined plan is collected.
 
     Score components:
     - normalized rating
     - popularity (log of votes)
     - cuisine match bonus
     """
-    normalized_cuisines = _normalize_cuisines(query.cuisines)
+    normalized_cuisines = query.normalized_cuisines
+    columns = lf.collect_schema().names()
 
-    rating_term = (pl.col("rating_numeric").fill_null(0) / 5.0).alias("rating_term")
-    votes_term = (
-        (pl.col("votes").fill_null(0).cast(pl.Float64) + 1.0)
-        .log10()
-        .fill_null(0.0)
-        .alias("votes_term")
-    )
+    # Prefer the score terms precomputed at index-build time; only frames
+    # without them (e.g. ad-hoc test frames) pay the per-row computation.
+    if "rating_term" in columns:
+        rating_term = pl.col("rating_term")
+    else:
+        rating_term = (pl.col("rating_numeric").fill_null(0) / 5.0).alias("rating_term")
+    if "votes_log10" in columns:
+        votes_term = pl.col("votes_log10").alias("votes_term")
+    else:
+        votes_term = (
+            (pl.col("votes").fill_null(0).cast(pl.Float64) + 1.0)
+            .log10()
+            .fill_null(0.0)
+            .alias("votes_term")
+        )
 
     if normalized_cuisines:
-        match_count = (
-            pl.col("cuisines_normalized")
-            .list.set_intersection(pl.lit(normalized_cuisines))
-            .list.len()
-            .fill_null(0)
-        )
+        bit_index = get_cuisine_bit_index()
+        if bit_index and CUISINE_MASK_COLUMNS[0] in columns:
+            match_count = _cuisine_mask_match_count(normalized_cuisines, bit_index)
+        else:
+            # Fallback for frames without mask columns (or datasets with too
+            # many distinct cuisines to encode).
+            match_count = (
+                pl.col("cuisines_normalized")
+                .list.set_intersection(pl.lit(normalized_cuisines))
+                .list.len()
+                .fill_null(0)
+            )
         cuisine_bonus = (match_count / float(len(normalized_cuisines))).alias(
             "cuisine_bonus"
         )
     else:
         cuisine_bonus = pl.lit(0.0).alias("cuisine_bonus")
 
-    scored = df.with_columns(
+    scored = lf.with_columns(
         [
             rating_term,
             votes_term,
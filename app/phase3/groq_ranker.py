@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 from dataclasses import dataclass
 from typing import Dict, List, Optional
 
 import httpx
+import orjson
 import polars as pl
 
 from app.core.config import settings
@@ -14,8 +16,83 @@ from app.schemas.recommendations import RecommendationQuery
 
 logger = logging.getLogger(__name__)
 
+# One connection pool for the whole process: keep-alive connections are
+# reused across requests (and across GroqRanker instances) instead of
+# paying a TCP + TLS handshake per call.
+_CLIENT_LIMITS = httpx.Limits(
+    max_connections=1000,
+    max_keepalive_connections=100,
+    keepalive_expiry=30.0,
+)
+
+_shared_client: Optional[httpx.AsyncClient] = None
+
+# Below this size the thread-pool handoff costs more than the parse itself.
+_PARSE_OFFLOAD_BYTES = 4096
+
+
+async def _parse_json(raw: str | bytes):
+    """Parse JSON, off the event loop when the blob is large enough to stall it."""
+    if len(raw) > _PARSE_OFFLOAD_BYTES:
+        return await asyncio.to_thread(orjson.loads, raw)
+    return orjson.loads(raw)
+
+# The ranking instructions never vary per request, so the prompt is built
+# once at import time rather than re-concatenated on every call.
+_SYSTEM_MSG = (
+    "You are ranking restaurants for a premium recommendation engine.\n\n"
+    "Balance the following factors:\n"
+    "1. Strength of requested cuisine match (primary but not absolute).\n"
+    "2. Overall rating quality.\n"
+    "3. Popularity (votes indicate trust).\n"
+    "4. Budget alignment with user range.\n\n"
+    "Avoid promoting restaurants where the requested cuisine is incidental.\n"
+    "Strong cuisine match means it is a core offering, not just one item.\n\n"
+    "Score must be a float between 0 and 1.\n"
+    "Higher score means better alignment with user preferences.\n\n"
+    "Each explanation must:\n"
+    "- Start with cuisine strength.\n"
+    "- Mention exactly one meaningful tradeoff.\n"
+    "- Be under 16 words.\n"
+    "- Avoid repetitive structure across restaurants.\n"
+    "- Avoid generic phrases like 'steady favorite' or 'niche spot'.\n\n"
+    "Tone should feel curated and intentional, not templated.\n\n"
+    "Return strict JSON:\n"
+    "{\n"
+    '  "summary": "one sentence",\n'
+    '  "restaurants": [\n'
+    '    { "id": int, "rank": int, "score": float, "explanation": string }\n'
+    "  ]\n"
+    "}\n\n"
+    "Do not invent restaurants."
+)
+
+
+def _get_shared_client() -> httpx.AsyncClient:
+    global _shared_client
+    if _shared_client is None or _shared_client.is_closed:
+        _shared_client = httpx.AsyncClient(
+            base_url="https://api.groq.com/openai/v1",
+            limits=_CLIENT_LIMITS,
+        )
+    return _shared_client
+
+
+async def aclose_shared_client() -> None:
+    """
+    Close the process-wide pooled client. Application-shutdown only: live
+    GroqRanker instances hold references to this client, so closing it
+    earlier would break every subsequent LLM call in the process.
+    """
+    global _shared_client
+    if _shared_client is not None and not _shared_client.is_closed:
+        await _shared_client.aclose()
+    _shared_client = None
+
 
-@dataclass
+# Allocated per candidate on every LLM response; slots halve the
+# per-instance footprint and skip the __dict__ lookup on field access.
+@dataclass(slots=True)
 class LLMRankedRestaurant:
     id: int
     explanation: Optional[str] = None
@@ -23,7 +100,7 @@ class LLMRankedRestaurant:
     rank: Optional[int] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class LLMRecommendationResult:
     restaurants: List[LLMRankedRestaurant]
     summary: Optional[str] = None
@@ -39,21 +116,33 @@ class GroqRanker:
         self,
         api_key: str | None = None,
         model: str | None = None,
-        timeout_seconds: float = 8.0,
+        timeout_seconds: float | None = None,
     ) -> None:
         self.api_key = api_key or settings.GROQ_API_KEY
         self.model = model or settings.GROQ_MODEL
-        self.timeout_seconds = timeout_seconds
-        self._client = httpx.AsyncClient(
-            base_url="https://api.groq.com/openai/v1",
-            timeout=self.timeout_seconds,
+        self.timeout_seconds = timeout_seconds or settings.GROQ_READ_TIMEOUT
+        # Staged timeouts: connect/write/pool problems surface fast, while
+        # the read phase keeps the full budget for the model to generate.
+        self._timeout = httpx.Timeout(
+            connect=settings.GROQ_CONNECT_TIMEOUT,
+            read=self.timeout_seconds,
+            write=settings.GROQ_WRITE_TIMEOUT,
+            pool=settings.GROQ_POOL_TIMEOUT,
         )
+        self._client = _get_shared_client()
+        self._headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
 
     def is_configured(self) -> bool:
         return bool(self.api_key and self.model)
 
     async def aclose(self) -> None:
-        await self._client.aclose()
+        # Intentionally a no-op: the underlying client is the process-wide
+        # shared pool, which other live instances (e.g. app.state.groq_ranker)
+        # keep using. It is closed once at shutdown via aclose_shared_client().
+        return None
 
     async def re_rank(
         self,
@@ -74,31 +163,32 @@ class GroqRanker:
 
         payload = self._build_payload(query, candidates)
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
-
         # ---------------- API CALL ----------------
         try:
             response = await self._client.post(
                 "/chat/completions",
-                headers=headers,
+                headers=self._headers,
                 json=payload,
+                timeout=self._timeout,
             )
-            response.raise_for_status()
-        except Exception as exc:
+        except httpx.HTTPError as exc:
+            # Transport-level failure (timeout, DNS, connection reset, ...).
             logger.warning("GroqRanker request failed: %s", exc)
-            try:
-                if hasattr(exc, "response") and exc.response is not None:
-                    logger.warning("Groq response body: %s", exc.response.text)
-            except Exception:
-                pass
+            return None
+
+        if response.status_code >= 400:
+            # A plain status check: no exception raised and unwound just to
+            # be converted back into a None on the very next line.
+            logger.warning(
+                "Groq returned HTTP %s: %s", response.status_code, response.text
+            )
             return None
 
         # ---------------- ROBUST PARSING ----------------
         try:
-            data = response.json()
+            # orjson decodes the raw bytes directly, several times faster
+            # than the stdlib parser httpx would use via response.json().
+            data = await _parse_json(response.content)
             content = data["choices"][0]["message"]["content"]
 
             if not content:
@@ -109,7 +199,7 @@ class GroqRanker:
 
             # Attempt direct JSON parse first
             try:
-                parsed = json.loads(content)
+                parsed = await _parse_json(content)
 
             except Exception:
                 # If wrapped in markdown code fences
@@ -120,16 +210,20 @@ class GroqRanker:
                         if content.startswith("json"):
                             content = content[4:].strip()
 
-                # Extract JSON object boundaries
+                # Decode the first complete JSON object in place. raw_decode
+                # stops at the object's end, so trailing prose or a "}" inside
+                # a string can't corrupt the slice like find/rfind could, and
+                # no substring copy of the content is made.
                 start = content.find("{")
-                end = content.rfind("}")
-
-                if start == -1 or end == -1:
+                if start == -1:
                     logger.warning("Groq content does not contain valid JSON: %s", content)
                     return None
 
-                json_str = content[start:end + 1]
-                parsed = json.loads(json_str)
+                try:
+                    parsed, _ = json.JSONDecoder().raw_decode(content, start)
+                except ValueError:
+                    logger.warning("Groq content does not contain valid JSON: %s", content)
+                    return None
 
         except Exception:
             logger.warning("GroqRanker response parse failed.")
@@ -150,48 +244,28 @@ class GroqRanker:
             "budget_max": query.budget_max,
         }
 
-        candidate_list: List[Dict] = []
-
-        for row in candidates.to_dicts():
-            candidate_list.append(
-                {
-                    "id": row["id"],
-                    "name": row["name"],
-                    "location": row.get("location"),
-                    "rating": row.get("rating_numeric"),
-                    "votes": row.get("votes"),
-                    "cuisines": row.get("cuisines_normalized") or [],
-                    "approx_cost_for_two": row.get("approx_cost_for_two"),
-                }
-            )
-
-        system_msg = (
-             "You are ranking restaurants for a premium recommendation engine.\n\n"
-             "Balance the following factors:\n"
-             "1. Strength of requested cuisine match (primary but not absolute).\n"
-             "2. Overall rating quality.\n"
-             "3. Popularity (votes indicate trust).\n"
-             "4. Budget alignment with user range.\n\n"
-             "Avoid promoting restaurants where the requested cuisine is incidental.\n"
-             "Strong cuisine match means it is a core offering, not just one item.\n\n"
-             "Score must be a float between 0 and 1.\n"
-             "Higher score means better alignment with user preferences.\n\n"
-             "Each explanation must:\n"
-             "- Start with cuisine strength.\n"
-             "- Mention exactly one meaningful tradeoff.\n"
-             "- Be under 16 words.\n"
-             "- Avoid repetitive structure across restaurants.\n"
-             "- Avoid generic phrases like 'steady favorite' or 'niche spot'.\n\n"
-             "Tone should feel curated and intentional, not templated.\n\n"
-             "Return strict JSON:\n"
-             "{\n"
-             '  \"summary\": \"one sentence\",\n'
-             '  \"restaurants\": [\n'
-             '    { \"id\": int, \"rank\": int, \"score\": float, \"explanation\": string }\n'
-             "  ]\n"
-             "}\n\n"
-             "Do not invent restaurants."
-             )
+        # Rename/shape the candidate columns in one Polars projection and let
+        # to_dicts materialize the final dicts directly, instead of converting
+        # every row to a dict only to rebuild it field by field in Python.
+        columns = set(candidates.columns)
+
+        def _col(name: str, alias: str) -> pl.Expr:
+            expr = pl.col(name) if name in columns else pl.lit(None)
+            return expr.alias(alias)
+
+        candidate_list: List[Dict] = candidates.select(
+            pl.col("id"),
+            pl.col("name"),
+            _col("location", "location"),
+            _col("rating_numeric", "rating"),
+            _col("votes", "votes"),
+            (
+                pl.col("cuisines_normalized").fill_null([])
+                if "cuisines_normalized" in columns
+                else pl.lit([], dtype=pl.List(pl.Utf8))
+            ).alias("cuisines"),
+            _col("approx_cost_for_two", "approx_cost_for_two"),
+        ).to_dicts()
 
         user_msg = {
             "user_preferences": user_prefs,
@@ -203,8 +277,8 @@ class GroqRanker:
             "temperature": 0.2,
             "max_tokens": 600,
             "messages": [
-                {"role": "system", "content": system_msg},
-                {"role": "user", "content": json.dumps(user_msg)},
+                {"role": "system", "content": _SYSTEM_MSG},
+                {"role": "user", "content": orjson.dumps(user_msg).decode()},
             ],
         }
 
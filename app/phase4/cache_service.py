@@ -1,35 +1,51 @@
 from __future__ import annotations
-import collections
-import hashlib
-import json
 from typing import Any, Hashable
 from app.schemas.recommendations import RecommendationQuery
 
+# Sentinel distinguishing "missing" from a stored None.
+_MISS = object()
+
 class LRUCache:
+    """
+    LRU cache on a plain dict: insertion order is guaranteed on CPython 3.7+,
+    so pop/reinsert gives recency tracking at roughly half the per-entry
+    memory of an OrderedDict and with one dict operation per access.
+    """
+
+    # Fixed-offset slot reads keep capacity/cache lookups off the instance
+    # __dict__ on the hot get/set path.
+    __slots__ = ("capacity", "cache")
+
     def __init__(self, capacity: int = 100):
         self.capacity = capacity
-        self.cache = collections.OrderedDict()
+        self.cache: dict = {}
 
     def get(self, key: Hashable) -> Any | None:
-        if key not in self.cache:
+        value = self.cache.pop(key, _MISS)
+        if value is _MISS:
             return None
-        self.cache.move_to_end(key)
-        return self.cache[key]
+        # Reinsert to mark as most recently used.
+        self.cache[key] = value
+        return value
 
     def set(self, key: Hashable, value: Any) -> None:
-        if key in self.cache:
-            self.cache.move_to_end(key)
+        self.cache.pop(key, None)
         self.cache[key] = value
         if len(self.cache) > self.capacity:
-            self.cache.popitem(last=False)
+            # Evict the least recently used (first-inserted) entry.
+            self.cache.pop(next(iter(self.cache)))
 
     def clear(self) -> None:
         self.cache.clear()
 
-def get_query_cache_key(query: RecommendationQuery) -> str:
-    """Generates a stable cache key for a recommendation query."""
-    query_dict = query.model_dump()
-    query_str = json.dumps(query_dict, sort_keys=True)
-    return hashlib.sha256(query_str.encode()).hexdigest()
+def get_query_cache_key(query: RecommendationQuery) -> tuple:
+    """
+    Generates a stable cache key for a recommendation query.
+
+    Delegates to the query's canonical signature tuple so every cache layer
+    (response cache, in-flight coalescing, downstream memoization) agrees on
+    what makes two queries equivalent.
+    """
+    return query.signature
 
 global_recommendation_cache = LRUCache(capacity=50)
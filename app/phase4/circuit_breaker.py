@@ -1,4 +1,5 @@
 from __future__ import annotations
+import threading
 import time
 from enum import Enum
 from typing import Callable, Any, TypeVar
@@ -25,56 +26,66 @@ class CircuitBreaker:
         self.state = CircuitState.CLOSED
         self.failure_count = 0
         self.last_failure_time = 0.0
+        # Guards state transitions only; never held while the wrapped
+        # function runs, so a plain threading.Lock is safe from both sync
+        # and async callers (the critical sections are a few field writes).
+        self._lock = threading.Lock()
 
     def call(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T | None:
         """
         Executes the function with circuit breaker logic.
         Returns None if the circuit is open.
         """
-        self._update_state()
-
-        if self.state == CircuitState.OPEN:
-            # Circuit is open, skip execution.
-            return None
+        with self._lock:
+            self._update_state(time.monotonic())
+            if self.state == CircuitState.OPEN:
+                # Circuit is open, skip execution.
+                return None
 
         try:
             result = func(*args, **kwargs)
-            self._on_success()
-            return result
         except Exception:
-            self._on_failure()
+            with self._lock:
+                self._on_failure(time.monotonic())
             return None
 
+        with self._lock:
+            self._on_success()
+        return result
+
     async def acall(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any | None:
         """
         Executes the async function with circuit breaker logic.
         Returns None if the circuit is open.
         """
-        self._update_state()
-
-        if self.state == CircuitState.OPEN:
-            return None
+        with self._lock:
+            self._update_state(time.monotonic())
+            if self.state == CircuitState.OPEN:
+                return None
 
         try:
             result = await func(*args, **kwargs)
-            self._on_success()
-            return result
         except Exception:
-            self._on_failure()
+            with self._lock:
+                self._on_failure(time.monotonic())
             return None
 
-    def _update_state(self) -> None:
+        with self._lock:
+            self._on_success()
+        return result
+
+    def _update_state(self, now: float) -> None:
         if self.state == CircuitState.OPEN:
-            if time.time() - self.last_failure_time > self.recovery_timeout_seconds:
+            if now - self.last_failure_time > self.recovery_timeout_seconds:
                 self.state = CircuitState.HALF_OPEN
 
     def _on_success(self) -> None:
         self.failure_count = 0
         self.state = CircuitState.CLOSED
 
-    def _on_failure(self) -> None:
+    def _on_failure(self, now: float) -> None:
         self.failure_count += 1
-        self.last_failure_time = time.time()
+        self.last_failure_time = now
         if self.failure_count >= self.failure_threshold:
             self.state = CircuitState.OPEN
 
@@ -1,4 +1,5 @@
 from __future__ import annotations
+import asyncio
 from pydantic import BaseModel
 from typing import Dict, Any
 
@@ -27,10 +28,15 @@ def check_groq_status() -> DependencyStatus:
         return DependencyStatus(status=groq_circuit_breaker.state.value, details=f"Groq API Key present for model: {settings.GROQ_MODEL}")
     return DependencyStatus(status="warning", details="Groq API Key is missing")
 
-def run_readiness_check() -> ReadinessResponse:
-    dataset_status = check_dataset_status()
+async def run_readiness_check() -> ReadinessResponse:
+    # The dataset probe can hit disk on a cold cache, so it runs in a worker
+    # thread instead of blocking the event loop. The Groq check only reads
+    # in-memory state and runs inline while the thread works.
+    dataset_task = asyncio.to_thread(check_dataset_status)
     groq_status = check_groq_status()
-    
+    dataset_status = await dataset_task
+
+
     total_status = "ready"
     if dataset_status.status == "error":
         total_status = "not_ready"
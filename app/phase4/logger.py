@@ -19,6 +19,9 @@ class StructuredLogger:
         extra: Dict[str, Any] | None = None,
     ) -> None:
         """Logs an API request with structured fields."""
+        # Skip building the dict entirely when INFO is filtered out.
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         log_data = {
             "type": "api_request",
             "method": method,
@@ -29,7 +32,8 @@ class StructuredLogger:
         }
         if extra:
             log_data.update(extra)
-        self.logger.info(f"Structured log: {log_data}")
+        # %-style args defer formatting to the handler, after level checks.
+        self.logger.info("Structured log: %s", log_data)
 
     def log_error(
         self,
@@ -39,6 +43,8 @@ class StructuredLogger:
         extra: Dict[str, Any] | None = None,
     ) -> None:
         """Logs an error with traceback if available."""
+        if not self.logger.isEnabledFor(logging.ERROR):
+            return
         log_data = {
             "type": "api_error",
             "message": message,
@@ -47,6 +53,6 @@ class StructuredLogger:
         }
         if extra:
             log_data.update(extra)
-        self.logger.error(f"Structured error: {log_data}")
+        self.logger.error("Structured error: %s", log_data)
 
 service_logger = StructuredLogger()
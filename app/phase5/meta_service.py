@@ -1,15 +1,27 @@
 from __future__ import annotations
 import polars as pl
+from functools import lru_cache
 from typing import Dict, Any
-from app.services.dataset_loader import get_restaurants_index
+from app.services.dataset_loader import (
+    get_restaurants_index,
+    register_index_derived_cache,
+)
 
 
 def get_filter_metadata() -> Dict[str, Any]:
     """
     Extract unique filter values from dataset.
     Now supports cuisines grouped by location.
+
+    The dataset is immutable for the life of the process, so the result is
+    computed once per loaded index (keyed on its identity, like the derived
+    indexes in the dataset loader) and served from cache afterwards.
     """
+    return _filter_metadata_for(id(get_restaurants_index()))
+
 
+@lru_cache(maxsize=1)
+def _filter_metadata_for(index_id: int) -> Dict[str, Any]:
     df = get_restaurants_index()
     df = df.drop_nulls("location")
 
@@ -22,20 +34,21 @@ def get_filter_metadata() -> Dict[str, Any]:
         .to_list()
     )
 
-    # Cuisines grouped by location
-    cuisines_by_location = {}
-
-    for loc in locations:
-        cuisines = (
-            df.filter(pl.col("location") == loc)
-            .select(pl.col("cuisines_normalized").list.explode())
-            .drop_nulls()
-            .unique()
-            .sort("cuisines_normalized")
-            .to_series()
-            .to_list()
-        )
-        cuisines_by_location[loc] = cuisines
+    # Cuisines grouped by location: one explode + group_by over the whole
+    # frame instead of a filter/explode/unique pass per location. Zipping
+    # the two columns directly skips iter_rows' per-row tuple construction;
+    # only the cuisine lists (which are returned) get materialized.
+    grouped = (
+        df.select("location", "cuisines_normalized")
+        .explode("cuisines_normalized")
+        .drop_nulls("cuisines_normalized")
+        .group_by("location")
+        .agg(pl.col("cuisines_normalized").unique().sort())
+    )
+    by_location = dict(
+        zip(grouped["location"], grouped["cuisines_normalized"].to_list())
+    )
+    cuisines_by_location = {loc: by_location.get(loc, []) for loc in locations}
 
     price_bands = [
         {"id": "low", "label": "₹0–₹400", "min": 0, "max": 400},
@@ -50,4 +63,7 @@ def get_filter_metadata() -> Dict[str, Any]:
         "cuisines_by_location": cuisines_by_location,
         "price_bands": price_bands,
         "rating_steps": rating_steps,
-    }
\ No newline at end of file
+    }
+
+
+register_index_derived_cache(_filter_metadata_for)
\ No newline at end of file
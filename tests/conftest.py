@@ -0,0 +1,43 @@
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from httpx import ASGITransport
+
+from app.core.config import settings
+from app.main import app
+
+
+@pytest.fixture(autouse=True)
+def _no_llm(monkeypatch):
+    """
+    Pin every test to the deterministic, network-free ranking path: even if
+    the environment carries USE_LLM_RANKING=true and a GROQ_API_KEY, the
+    recommendation pipeline must never reach out to Groq during tests. The
+    Phase 3 integration test builds its own GroqRanker and is unaffected.
+    """
+    monkeypatch.setattr(settings, "USE_LLM_RANKING", False)
+
+
+@pytest.fixture(scope="session")
+def client():
+    """
+    Session-wide sync TestClient, entered as a context manager so the app
+    lifespan (dataset warm load, Groq client setup) runs exactly once for
+    the whole session instead of on each module's first request.
+    """
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def async_client():
+    """
+    Session-wide ASGI client: requests hit the app directly on the event
+    loop, with no portal thread hop per call and one client for the whole
+    test session.
+    """
+    async with httpx.AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        yield client
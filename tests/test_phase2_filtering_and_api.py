@@ -30,7 +30,7 @@ def test_filter_and_rank_pipeline_smoke():
         max_results=10,
     )
 
-    filtered = filter_restaurants(df, query)
+    filtered = filter_restaurants(df.lazy(), query).collect()
     assert filtered.height > 0
 
     # Verify filters roughly held.
@@ -39,7 +39,7 @@ def test_filter_and_rank_pipeline_smoke():
         >= query.min_rating - 0.01
     )
 
-    ranked = rank_restaurants(filtered, query)
+    ranked = rank_restaurants(filtered.lazy(), query).collect()
     assert "score" in ranked.columns
     assert ranked.height == filtered.height
 
@@ -1,13 +1,9 @@
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
 from app.phase4.cache_service import global_recommendation_cache, get_query_cache_key
 from app.phase4.circuit_breaker import CircuitBreaker, CircuitState
 from app.schemas.recommendations import RecommendationQuery
 
-client = TestClient(app)
-
-def test_health_ready():
+def test_health_ready(client):
     response = client.get("/health/ready")
     assert response.status_code == 200
     data = response.json()
@@ -16,7 +12,7 @@ def test_health_ready():
     assert "dataset" in data["dependencies"]
     assert "groq_llm" in data["dependencies"]
 
-def test_cache_mechanism():
+def test_cache_mechanism(client):
     # Clear cache first
     global_recommendation_cache.clear()
     
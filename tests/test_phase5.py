@@ -1,57 +1,111 @@
+from types import MappingProxyType
+
+import orjson
+import polars as pl
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
 
-client = TestClient(app)
+import app.phase1.dataset_loader as dataset_loader
+from app.phase4.cache_service import global_recommendation_cache
+from app.schemas.recommendations import RecommendationsResponse
+from app.services.dataset_loader import get_restaurants_index
+
+# Tiny in-memory dataset covering both contract payloads' filters, so each
+# endpoint call filters a handful of rows instead of the full Zomato parquet.
+# Rows outside Banashankari / below the rating floors keep the filters honest.
+FAKE_ROWS = [
+    {"id": 0, "name": "Spice Route", "location": "Banashankari", "rating_numeric": 4.4, "votes": 820, "cuisines_normalized": ["north indian", "chinese"], "approx_cost_for_two": 600},
+    {"id": 1, "name": "Dragon Bowl", "location": "Banashankari", "rating_numeric": 4.1, "votes": 450, "cuisines_normalized": ["chinese"], "approx_cost_for_two": 400},
+    {"id": 2, "name": "Tandoor Tales", "location": "Banashankari", "rating_numeric": 4.0, "votes": 300, "cuisines_normalized": ["north indian"], "approx_cost_for_two": 800},
+    {"id": 3, "name": "Curry Corner", "location": "Banashankari", "rating_numeric": 3.6, "votes": 150, "cuisines_normalized": ["north indian"], "approx_cost_for_two": 350},
+    {"id": 4, "name": "Budget Bites", "location": "Banashankari", "rating_numeric": 3.2, "votes": 90, "cuisines_normalized": ["south indian"], "approx_cost_for_two": 200},
+    {"id": 5, "name": "Low Star Cafe", "location": "Banashankari", "rating_numeric": 2.8, "votes": 40, "cuisines_normalized": ["cafe"], "approx_cost_for_two": 300},
+    {"id": 6, "name": "Pricey Plates", "location": "Banashankari", "rating_numeric": 4.5, "votes": 700, "cuisines_normalized": ["north indian"], "approx_cost_for_two": 2500},
+    {"id": 7, "name": "Other Area Diner", "location": "Indiranagar", "rating_numeric": 4.6, "votes": 900, "cuisines_normalized": ["north indian", "chinese"], "approx_cost_for_two": 650},
+    {"id": 8, "name": "Far Away Wok", "location": "Whitefield", "rating_numeric": 4.3, "votes": 500, "cuisines_normalized": ["chinese"], "approx_cost_for_two": 550},
+    {"id": 9, "name": "No Rating Yet", "location": "Banashankari", "rating_numeric": None, "votes": 5, "cuisines_normalized": ["north indian"], "approx_cost_for_two": 450},
+]
+
 
-def test_recommendations_endpoint_contract():
+@pytest.fixture(scope="module", autouse=True)
+def _small_index():
     """
-    Test that the backend API matches the expectations of the Phase 5 frontend.
-    The frontend sends: location, cuisines (list), min_rating, budget_min, budget_max, max_results, use_llm.
+    Serve the contract tests from the in-memory FAKE_ROWS frame: the loader
+    is patched and the index singleton rebuilt, so no test in this module
+    pays the full parquet load. The derived memos (token index, bit index,
+    rank-stage cache) key on the index identity and follow automatically;
+    teardown restores the real index for any module sharing this worker.
     """
-    payload = {
-        "location": "Banashankari",
-        "cuisines": ["North Indian", "Chinese"],
-        "min_rating": 4.0,
-        "budget_min": 200,
-        "budget_max": 1000,
-        "max_results": 10,
-        "use_llm": False # Set to False for faster test if Groq is not configured
-    }
-    
-    response = client.post("/api/v1/recommendations", json=payload)
-    
-    # Check status code
-    assert response.status_code == 200
-    
-    data = response.json()
-    
-    # Check response structure
-    assert "restaurants" in data
-    assert isinstance(data["restaurants"], list)
-    
-    if len(data["restaurants"]) > 0:
-        rest = data["restaurants"][0]
-        # These fields are used by the frontend
-        assert "name" in rest
-        assert "rating" in rest
-        assert "votes" in rest
-        assert "cuisines" in rest
-        assert "approx_cost_for_two" in rest
-        # "explanation" is optional but allowed
-        assert "explanation" in rest or True 
-
-def test_frontend_integration_payload_empty_cuisines():
-    """Test with empty cuisines which the frontend might send."""
-    payload = {
-        "location": "Banashankari",
-        "cuisines": [],
-        "min_rating": 3.0,
-        "budget_min": 0,
-        "budget_max": 5000,
-        "max_results": 5,
-        "use_llm": False
-    }
-    response = client.post("/api/v1/recommendations", json=payload)
+    frame = pl.DataFrame(FAKE_ROWS).with_columns(
+        pl.col("location")
+        .str.to_lowercase()
+        .str.strip_chars()
+        .cast(pl.Categorical)
+        .alias("location_normalized")
+    )
+    mp = pytest.MonkeyPatch()
+    mp.setattr(
+        dataset_loader,
+        "build_restaurants_index",
+        lambda limit=None, force_rebuild=False: frame,
+    )
+    get_restaurants_index(force_rebuild=True)
+    global_recommendation_cache.clear()
+    yield
+    mp.undo()
+    get_restaurants_index(force_rebuild=True)
+    global_recommendation_cache.clear()
+
+# Posting pre-encoded orjson bytes via `content=` skips httpx's stdlib-json
+# request serialization; the app side already responds through ORJSONResponse.
+JSON_HEADERS = {"content-type": "application/json"}
+
+# The frontend sends: location, cuisines (list), min_rating, budget_min,
+# budget_max, max_results, use_llm (False keeps tests fast without Groq).
+# Read-only proxies so no test can mutate the shared payloads in place.
+PAYLOAD_FULL = MappingProxyType({
+    "location": "Banashankari",
+    "cuisines": ["North Indian", "Chinese"],
+    "min_rating": 4.0,
+    "budget_min": 200,
+    "budget_max": 1000,
+    "max_results": 10,
+    "use_llm": False
+})
+
+PAYLOAD_EMPTY_CUISINES = MappingProxyType({
+    "location": "Banashankari",
+    "cuisines": [],
+    "min_rating": 3.0,
+    "budget_min": 0,
+    "budget_max": 5000,
+    "max_results": 5,
+    "use_llm": False
+})
+
+# Serialized once at import time: repeated invocations (reruns, --count
+# loops, watch mode) post the same bytes without re-encoding the dicts.
+# orjson does not serialize mapping proxies, hence the dict() copies.
+PAYLOAD_FULL_BYTES = orjson.dumps(dict(PAYLOAD_FULL))
+PAYLOAD_EMPTY_CUISINES_BYTES = orjson.dumps(dict(PAYLOAD_EMPTY_CUISINES))
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize(
+    "payload_bytes",
+    [PAYLOAD_FULL_BYTES, PAYLOAD_EMPTY_CUISINES_BYTES],
+    ids=["full", "empty_cuisines"],
+)
+async def test_recommendations_contract(async_client, payload_bytes):
+    """Test that the backend API matches the expectations of the Phase 5 frontend."""
+    response = await async_client.post(
+        "/api/v1/recommendations",
+        content=payload_bytes,
+        headers=JSON_HEADERS,
+    )
+
     assert response.status_code == 200
-    assert "restaurants" in data if (data := response.json()) else True
+    # One pydantic-core pass over the raw bytes validates the whole envelope
+    # (the frontend-consumed fields — name, rating, votes, approx_cost_for_two
+    # — are required on RestaurantOut) instead of per-key dict asserts on an
+    # intermediate response.json() dict.
+    parsed = RecommendationsResponse.model_validate_json(response.content)
+    assert isinstance(parsed.restaurants, list)